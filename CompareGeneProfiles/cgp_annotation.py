@@ -18,6 +18,7 @@
 #         getPvogMembers
 #         getNCBItaxonomy
 #         link2databaseIdentifiers
+#         getGFFannotationRecord
 #         returnGFFannotationRecord
 #         printAnnotationRecord
 #         printAnnotationRecord_tabHeader
@@ -320,7 +321,7 @@ class annotationRecord(object):
         return 
 
     # Return annotations as a semicolon-delimited string
-    def returnGFFannotationRecord(self,FILE_HANDLE):
+    def getGFFannotationRecord(self):
         annot = ''
         if self.annotationType == 'gene':
             annot = '(gene) ' + self.start + '/' + self.end + '/' + self.strand + ' ' + self.method 
@@ -343,11 +344,11 @@ class annotationRecord(object):
         else:
             annot = '(unk type) ' + self.method + ' ' + self.description
 
-        annotationString = ""
-        for item in self.annotationList:
-            annotationString += item
-        annot += annotationString
-        FILE_HANDLE.write("%s" % (annot))
+        annot += ''.join(self.annotationList)
+        return annot
+
+    def returnGFFannotationRecord(self,FILE_HANDLE):
+        FILE_HANDLE.write("%s" % (self.getGFFannotationRecord()))
 
     # PRINT METHODS
 
@@ -9,6 +9,7 @@
 # Classes and methods: 
 #     fasta
 #         queryNRsequence
+#         enterData
 #         enterGeneData
 #         enterProteinData
 #         assignType
@@ -33,6 +34,7 @@
 #         getStartCodon
 #         verifyProkaryoticStartCodon
 #         highlightAllStartCodons
+#         countStartCodons
 #         consolidate
 #         getSequenceLength
 #         getSubsequence
@@ -50,6 +52,7 @@
 #         printData2file_GFF
 #         printData2file
 #         splitToList
+#         iterLines
 #         getAnnotationlist
 #         printAnnotations
 #         printAnnotations_tab
@@ -59,7 +62,11 @@
 #         reportStats
 #         countParalogs
 #         addFasta
+#         addFastaRecord
 #         addFastas
+#         addFastasFromBytes
+#         addFastasFromStream
+#         addFastaHeaders
 #         addFastasFromFile
 #         addAnnotation
 #         deleteFasta
@@ -70,9 +77,14 @@
 #         printAll
 #         printAll2file
 #         renumber
+#         indexHeaders
 #         matchHeader
 #         removeEMBOSSpostfix
 #         removeTerminalAsterisk   
+#     openGzipFile
+#     iterFastaRecords
+#     readMultiFastaFile
+#     readMultiFastaFiles
 #
 ####################################################################    
 
@@ -80,10 +92,17 @@
 # THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
 
 import re, string
-from Bio.Seq import Seq
 import cgp_annotation as annotation
 from Bio import SeqIO  
-import os
+import os, mmap, io, gzip
+from multiprocessing import Pool
+
+# Rapidgzip is optional; if installed, gzipped fasta files are decompressed in parallel (otherwise, by gzip module)
+try:
+    import rapidgzip
+    RAPIDGZIP_AVAILABLE = True
+except ImportError:
+    RAPIDGZIP_AVAILABLE = False
 
 # Boolean control of verbosity
 
@@ -123,13 +142,44 @@ GFF_SOURCE     = "PhATE"
 GFF_SCORE      = EMPTY_COL  # blast hit stats will not be reported here
 GFF_PHASE      = EMPTY_COL  # phase will not be reported here
 
-# Patterns
-p_extra      = re.compile('(\s)|([0-9])|(\*)') # characters often included in sequence text 
-p_header     = re.compile('^>(.*)')
-p_comment    = re.compile('^#')
-p_up2space   = re.compile('^\S*')   # find 1st instance of everything that's not white space (check this)
-p_startCodon = re.compile('atg')  # standard start codon sequence (recall: storing sequence as lower case)
-
+# Molecule types reported as CDS vs. gene features in GFF output
+CDS_MOLECULE_TYPES  = frozenset(('peptide','protein'))
+GENE_MOLECULE_TYPES = frozenset(('gene',))
+
+# Size of blocks in which fasta files are read (see multiFasta.addFastasFromStream)
+READ_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Characters that give a search string regular-expression meaning (see multiFasta.findStringInHeader)
+REGEX_METACHARS = frozenset('.^$*+?{}[]\\|()')
+
+# Any non-whitespace byte; finds whether multi-fasta data (bytes or mmap) has content, stopping at the first hit
+p_nonSpace = re.compile(rb'\S')
+
+# Characters that assignHeader replaces or removes in deriving header variants
+HEADER_SYMBOLS = frozenset(' ();:?.')
+
+# Translation tables
+t_revComp    = str.maketrans('acgtrymkswhbvdnxACGTRYMKSWHBVDNX','tgcayrkmswdvbhnxTGCAYRKMSWDVBHNX') # complement, incl. IUPAC ambiguity codes
+t_hdrStrip   = str.maketrans('','','();:?.')  # symbols removed from a clean header
+t_seqStrip   = str.maketrans('','',' \t\n\r\f\v0123456789*')  # characters often included in sequence text
+t_seqClean   = str.maketrans(string.ascii_uppercase,string.ascii_lowercase,' \t\n\r\f\v0123456789*')  # lower-case and strip in one pass
+
+def openGzipFile(filename):  # Open a gzipped file for reading; returns binary, decompressed file object
+    if RAPIDGZIP_AVAILABLE:
+        return rapidgzip.open(filename,parallelization=os.cpu_count())
+    return gzip.open(filename,"rb")
+
+def iterFastaRecords(data):  # Given multi-fasta data (bytes), yield each record (bytes) without its leading '>'
+    start = 1 if data[:1] == b'>' else 0
+    # bytes.find is a C (memchr-based) scan; records are sliced one at a time, rather than all at once by split(),
+    # so no list of record positions is built for the whole data (which may be a memory-mapped file)
+    while True:
+        nextHeader = data.find(b'\n>',start)
+        if nextHeader == -1:
+            yield data[start:]
+            return
+        yield data[start:nextHeader]
+        start = nextHeader + 2
 
 #######################################################################################
 
@@ -145,6 +195,42 @@ class fasta(object):
     # Sequence can be entered as a list of lines or as continuous sequence in a single string.
     # Sequence can be converted back & forth between lines vs. single string.
 
+    # Declaring attributes in __slots__ avoids a per-object __dict__; this matters for genomes with many genes/proteins.
+    # Note that the header variants remain separate attributes (slots are more compact than a per-object dict of headers).
+    __slots__ = ('header','cleanHeader','truncHeader','shortHeader','compoundHeader','blastHeader','_sequentialHeader','customHeader',
+        'name','sequence','sequenceType','moleculeType','parentSequence','truncation','annotationList','paralogList',
+        'startCodonCount','codonStartLocs','start','end','parentName','parentStart','parentEnd','parentStrand','strand',
+        'nrHeader','nrGInumber','geneCallFile','geneCaller','geneCallRank','nextFastaNumber','order','number',
+        'pVOGassociationList','pVOGcount','contig')
+
+    # Header type (lower case), as passed to getHeader/printFasta2file*, mapped to the attribute holding that header
+    HEADER_ATTR = {
+        'full'       : 'header',
+        'clean'      : 'cleanHeader',
+        'trunc'      : 'truncHeader',
+        'truncated'  : 'truncHeader',
+        'short'      : 'shortHeader',
+        'compound'   : 'compoundHeader',
+        'blast'      : 'blastHeader',
+        'sequential' : 'sequentialHeader',
+        'custom'     : 'customHeader',
+        }
+
+    # Gene/protein data key, as passed to enterData, mapped to (attribute or method name, whether it is a method)
+    DATA_ATTR = {
+        'header'         : ('assignHeader',   True),
+        'name'           : ('name',           False),
+        'sequence'       : ('sequence',       False),
+        'type'           : ('sequenceType',   False),
+        'start'          : ('start',          False),
+        'end'            : ('end',            False),
+        'parentSequence' : ('parentSequence', False),
+        'parentName'     : ('parentName',     False),
+        'parentStart'    : ('parentStart',    False),
+        'parentEnd'      : ('parentEnd',      False),
+        'order'          : ('order',          False),
+        }
+
     def __init__(self):
         self.header = "unknown"           # full, original header
         self.cleanHeader = ""             # remove all special chars from original header
@@ -183,75 +269,49 @@ class fasta(object):
         self.pVOGcount = 0                # for dignostics in constructing pVOG fasta data set
         self.contig = "unknown"           # name of contig this fasta is associated with
 
+    # The sequential header is derived from moleculeType and order when first requested after assignHeader,
+    # rather than on every (re-)assignment of the header
+
+    @property
+    def sequentialHeader(self):
+        if self._sequentialHeader is None:
+            self._sequentialHeader = self.moleculeType + '-' + str(self.order)
+        return self._sequentialHeader
+
+    @sequentialHeader.setter
+    def sequentialHeader(self,hdr):
+        self._sequentialHeader = hdr
+
     def queryNRsequence(self,gi,nrLocation):  # Specific to NR; any other database has different format 
         # Given an NCBI gi identifier and the dir/file of an NR database, pull the sequence from NR database
         if gi != "" and int(gi) > 0: 
-            giString = "gi\|" + gi + "\|"
+            giString = "gi|" + gi + "|"  # fixed string, so a substring test suffices (no regex)
         else:
             print("problem with gi")
             return(0)
         for record in SeqIO.parse(nrLocation,"fasta"):
-            match = re.findall(giString,record.id)
-            if match:
+            if giString in record.id:
                 self.assignHeader(record.id)
                 self.assignSequence(str(record.seq))
-
-    #*** Should collapse enterGeneData and enterProteinData as single method
-    def enterGeneData(self,geneData): #*** should create a gene class, which "inherits" fasta
-        if isinstance(geneData,dict): #*** should pass **kvargs and check for keys
-            if "header" in list(geneData.keys()):
-                self.assignHeader(geneData["header"])
-            if "name" in list(geneData.keys()):
-                self.name = geneData["name"]
-            if "sequence" in list(geneData.keys()):
-                self.sequence = geneData["sequence"]
-            if "type" in list(geneData.keys()):
-                self.sequenceType = geneData["type"]
-            if "start" in list(geneData.keys()):
-                self.start = geneData["start"]
-            if "end" in list(geneData.keys()):
-                self.end = geneData["end"]
-            if "parentSequence" in list(geneData.keys()):
-                self.parentSequence = geneData["parentSequence"]
-            if "parentName" in list(geneData.keys()):
-                self.parentName = geneData["parentName"]
-            if "parentStart" in list(geneData.keys()):
-                self.parentStart = geneData["parentStart"]
-            if "parentEnd" in list(geneData.keys()):
-                self.parentEnd = geneData["parentEnd"]
-            if "order" in list(geneData.keys()):
-                self.order = geneData["order"]
+                break  # gi identifiers are unique; no need to scan the remainder of NR
+
+    def enterData(self,data):  # Shared by enterGeneData and enterProteinData
+        if isinstance(data,dict): #*** should pass **kvargs and check for keys
+            for key, (attr, isMethod) in self.DATA_ATTR.items():
+                if key in data:
+                    if isMethod:
+                        getattr(self,attr)(data[key])
+                    else:
+                        setattr(self,attr,data[key])
             return True
         else:
             return False
 
+    def enterGeneData(self,geneData): #*** should create a gene class, which "inherits" fasta
+        return self.enterData(geneData)
+
     def enterProteinData(self,proteinData): #*** should create a protein class, which "inherits" fasta
-        if isinstance(proteinData,dict): #*** should pass **kvargs and check for keys
-            if "header" in list(proteinData.keys()):
-                self.assignHeader(proteinData["header"])
-            if "name" in list(proteinData.keys()):
-                self.name = proteinData["name"]
-            if "sequence" in list(proteinData.keys()):
-                self.sequence = proteinData["sequence"]
-            if "type" in list(proteinData.keys()):
-                self.sequenceType = proteinData["type"]
-            if "start" in list(proteinData.keys()):
-                self.start = proteinData["start"]
-            if "end" in list(proteinData.keys()):
-                self.end = proteinData["end"]
-            if "parentSequence" in list(proteinData.keys()):
-                self.parentSequence = proteinData["parentSequence"]
-            if "parentName" in list(proteinData.keys()):
-                self.parentName = proteinData["parentName"]
-            if "parentStart" in list(proteinData.keys()):
-                self.parentStart = proteinData["parentStart"]
-            if "parentEnd" in list(proteinData.keys()):
-                self.parentEnd = proteinData["parentEnd"]
-            if "order" in list(proteinData.keys()):
-                self.order = proteinData["order"]
-            return True
-        else:
-            return False
+        return self.enterData(proteinData)
 
     def assignType(self,mtype):
         if mtype.lower() == "nt" or mtype.lower() == "nucl" or mtype.lower() == "nucleotide":
@@ -264,19 +324,21 @@ class fasta(object):
     def assignHeader(self,hdr):   # Remove symbols and spaces, which may cause problems for open-source codes
         cleanHeader = hdr.lstrip('>') # Remove '>' symbol if present; store header text only
         self.header = cleanHeader  # Store full, original header, but without the '>'
-        splitSpace = cleanHeader.split(' ') # Note: Blast truncates after the 1st space
-        self.blastHeader = splitSpace[0] 
-        cleanHeader = re.sub(' ', '_', cleanHeader)
-        cleanHeader = re.sub('[();:?\.]','',cleanHeader)
-        self.cleanHeader = cleanHeader
+        if HEADER_SYMBOLS.isdisjoint(cleanHeader):  # Common case (eg, gene-caller output): nothing to clean
+            self.blastHeader = cleanHeader
+            self.cleanHeader = cleanHeader
+        else:
+            self.blastHeader = cleanHeader.split(' ',1)[0] # Note: Blast truncates after the 1st space
+            self.cleanHeader = cleanHeader.replace(' ','_').translate(t_hdrStrip)
         self.truncHeader = self.header[0:self.truncation]
-        # Assign a benign, sequential header 
-        self.sequentialHeader = self.moleculeType + '-' + str(self.order)
-        match = p_up2space.match(self.header)
-        if match:
-            self.shortHeader = match.group()
+        # Assign a benign, sequential header (computed on demand; see sequentialHeader property)
+        self._sequentialHeader = None
+        # Short header runs up to the 1st white space of any kind (eg, tab; consistent w/RAST); blast cuts at 1st space only
+        shortFields = self.blastHeader.split(None,1)
+        if shortFields and not self.blastHeader[:1].isspace():
+            self.shortHeader = shortFields[0]
         else:
-            self.shortHeader = self.truncHeader
+            self.shortHeader = ''  # header begins with white space
         self.compoundHeader = self.header
         if self.parentSequence:
             self.compoundHeader = self.compoundHeader + '_' + self.parentSequence
@@ -293,12 +355,10 @@ class fasta(object):
 
     def assignSequence(self,seq):      # Input is single string or a list of strings
         if isinstance(seq,str):
-            self.sequence = seq.lower()
-            self.consolidate()         # Remove white spaces & numbers, if present
+            self.sequence = seq.translate(t_seqClean)           # Lower case; remove white spaces & numbers, if present
             return True
         elif isinstance(seq,list):
-            self.sequence = ''.join(seq.lower())
-            self.consolidate()         # Remove white space and collapse
+            self.sequence = ''.join(seq).translate(t_seqClean)  # Lower case; remove white space and collapse
             return True
         else:
             seqType = type(seq)
@@ -338,23 +398,9 @@ class fasta(object):
         return ('>' + self.customHeader)
  
     def getHeader(self,hdrType):
-        headerType = hdrType.lower()
-        if headerType == 'full':
-            return ('>' + self.header)
-        elif headerType == 'clean':
-            return ('>' + self.cleanHeader)
-        elif headerType == 'trunc':
-            return ('>' + self.truncHeader)
-        elif headerType == 'short':
-            return ('>' + self.shortHeader)
-        elif headerType == 'compound':
-            return ('>' + self.compoundHeader)
-        elif headerType == 'blast':
-            return ('>' + self.blastHeader)
-        elif headerType == 'sequential':
-            return ('>' + self.sequentialHeader)
-        elif headerType == 'custom':
-            return ('>' + self.customHeader)
+        headerAttr = self.HEADER_ATTR.get(hdrType.lower())
+        if headerAttr:
+            return ('>' + getattr(self,headerAttr))
         else:
             if PHATE_WARNINGS == 'True':
                 print("cgp_fastaSequence says, WARNING: Invalid header type:", hdrType, "--Choose full, clean, trunc, short, compound, blast")
@@ -379,35 +425,38 @@ class fasta(object):
 
     def highlightAllStartCodons(self):
         codonStarts = []
-        seqList = list(self.sequence)
         codonsHighlighted = ""
         if self.sequence != "":
-            codonStarts = [m.start() for m in re.finditer('atg',self.sequence)]
+            seqBytes = bytearray(self.sequence,'ascii')  # upper-case each codon in place, rather than per character
+            start = seqBytes.find(b'atg')  # C (memchr-based) scan between codons
+            while start != -1:
+                codonStarts.append(start)
+                seqBytes[start:start+3] = b'ATG'
+                start = seqBytes.find(b'atg',start+3)
             self.startCodonCount = len(codonStarts)
-            for start in codonStarts:
-                seqList[start] = seqList[start].upper()
-                seqList[start+1] = seqList[start+1].upper()
-                seqList[start+2] = seqList[start+2].upper()
-            codonsHighlighted = ''.join(seqList)
+            codonsHighlighted = seqBytes.decode('ascii')
             self.codonStartLocs = codonStarts
         return codonsHighlighted 
 
+    def countStartCodons(self):  # Use when only the count is needed; does not record locations or highlight codons
+        self.startCodonCount = self.sequence.count('atg')
+        return self.startCodonCount
+
     def consolidate(self): # Remove white space and collapse sequence
-        self.sequence = p_extra.sub('',self.sequence) # 
+        self.sequence = self.sequence.translate(t_seqStrip)
 
     def getSequenceLength(self):
         return (len(self.sequence))     # Report how long the sequence is
 
     def getSubsequence(self,start,end): # Recall: string position numbering starts with 0!
-        return (self.sequence[int(start):int(end)])
+        return (self.sequence[start:end])  # start, end must be int; callers convert gene-call (text) positions
 
     def getPVOGassociationList(self):
         return (self.pVOGassociationList)
 
     def reverseComplement(self):
         if self.sequenceType.lower() == "nt":
-            tempSeq = Seq(self.sequence)
-            self.sequence = tempSeq.reverse_complement()
+            self.sequence = self.sequence.translate(t_revComp)[::-1]  # sequence remains a str (not a Bio Seq object)
             return True
         return False
 
@@ -430,45 +479,21 @@ class fasta(object):
         print("sequentialHeader:",self.sequentialHeader)
         print("customHeader:",self.customHeader)
 
-    def printFasta2file(self,FILE_HANDLE,headerType="short"):
-        if headerType.lower() == "compound":
-            hdr = self.getCompoundHeader()
-        elif headerType.lower() == "full":
-            hdr = self.getFullHeader()
-        elif headerType.lower() == "truncated":
-            hdr = self.getTruncHeader()
-        elif headerType.lower() == "short":
-            hdr = self.getShortHeader()
-        elif headerType.lower() == "blast":
-            hdr = self.getBlastHeader()
-        elif headerType.lower() == "sequential":
-            hdr = self.getSequentialHeader()
-        elif headerType.lower() == "custom":
-            hdr = self.getCustomHeader()
+    def printFasta2file(self,FILE_HANDLE,headerType="short",lineLength=0):  # lineLength > 0 wraps the sequence
+        hdr = '>' + getattr(self,self.HEADER_ATTR.get(headerType.lower(),'shortHeader'))
+        if lineLength > 0:
+            FILE_HANDLE.write("%s\n" % (hdr))
+            for line in self.iterLines(lineLength):
+                FILE_HANDLE.write("%s\n" % (line))
         else:
-            hdr = self.getShortHeader()
-        seq = self.sequence
-        FILE_HANDLE.write("%s%s" % (hdr,"\n"))
-        FILE_HANDLE.write("%s%s" % (self.sequence,"\n"))
+            FILE_HANDLE.write("%s\n%s\n" % (hdr,self.sequence))
 
     def printFasta2file_case(self,FILE_HANDLE,case,headerType="short"):
-        if headerType.lower() == "compound":
-            hdr = self.getCompoundHeader()
-        elif headerType.lower() == "full":
-            hdr = self.getFullHeader()
-        elif headerType.lower() == "truncated":
-            hdr = self.getTruncHeader()
-        elif headerType.lower() == "short":
-            hdr = self.getShortHeader()
-        elif headerType.lower() == "sequential":
-            hdr = self.getSequentialHeader()
-        else:
-            hdr = self.getShortHeader()
+        hdr = '>' + getattr(self,self.HEADER_ATTR.get(headerType.lower(),'shortHeader'))
         seq = self.sequence
         if case.lower() == "upper":
             seq = seq.upper()
-        FILE_HANDLE.write("%s%s" % (hdr,"\n"))
-        FILE_HANDLE.write("%s%s" % (seq,"\n"))
+        FILE_HANDLE.write("%s\n%s\n" % (hdr,seq))
 
     def printAll(self):  # Dump everything: useful for testing  
         print("Header:                   ", self.header)
@@ -524,31 +549,30 @@ class fasta(object):
 
     def printAll2file_tab(self,FILE_HANDLE):
         tabLine = 'Header:' + self.header + '\tName:' + self.name + '\tType:' + self.sequenceType + '\tOrder:' + str(self.order) + '\tparent:' + str(self.start) + '/' + str(self.end) + '/' + str(self.strand) + '/' + self.parentName + '\tlength: ' + str(len(self.sequence))
-        FILE_HANDLE.write("%s\n" % (tabLine))
+        FILE_HANDLE.write(tabLine + "\n")
         if self.annotationList:
             self.printAnnotations2file_tab(FILE_HANDLE)
         else:
-            FILE_HANDLE.write("%s\n" % ("There are no annotations"))
+            FILE_HANDLE.write("There are no annotations\n")
         if len(self.sequence) < 1000:
             FILE_HANDLE.write("%s\n" % (self.sequence))
         else:
-            FILE_HANDLE.write("%s\n" % ("Sequence too long to print. See file."))
+            FILE_HANDLE.write("Sequence too long to print. See file.\n")
 
     def printData2file_GFF(self,FILE_HANDLE,feature,contigName):
         # Note: pragmas are printed by calling method (ex: phate_genomeSequence/printGenomeData2file_GFF)
         GFF_annotationString = ''
         GFF_type = "unknown"
-        FIRST = True
 
         # Construct data fields
         GFF_parentName = self.parentName        # column 1
         GFF_source     = GFF_SOURCE             # column 2
 
-        if self.moleculeType == 'peptide' or self.moleculeType == 'protein' or self.sequenceType == 'aa' or feature == 'CDS':
+        if self.moleculeType in CDS_MOLECULE_TYPES or self.sequenceType == 'aa' or feature == 'CDS':
             GFF_type   = "CDS"                  # column 3
             GFF_start  = str(self.parentStart)  # column 4
             GFF_end    = str(self.parentEnd)    # column 5
-        elif self.moleculeType == 'gene' or self.sequenceType == 'nt' or feature == 'gene':
+        elif self.moleculeType in GENE_MOLECULE_TYPES or self.sequenceType == 'nt' or feature == 'gene':
             GFF_type   = "gene"                 # column 3
             GFF_start  = str(self.start)        # colunn 4
             GFF_end    = str(self.end)          # column 5
@@ -559,57 +583,41 @@ class fasta(object):
 
         # Last one is complicated...
         # Column 9 has many sub-fields, starting with sequence identifier and parent
-        if self.moleculeType == 'peptide' or self.moleculeType == 'protein' or self.sequenceType == 'aa':
+        if self.moleculeType in CDS_MOLECULE_TYPES or self.sequenceType == 'aa':
             GFF_identifier = "ID=" + self.header + "_cds"
-        elif self.moleculeType == 'gene' or self.sequenceType == 'nt':
+        elif self.moleculeType in GENE_MOLECULE_TYPES or self.sequenceType == 'nt':
             GFF_identifier = "ID=" + self.header
 
-        # Write 1st 8 columns of data to file
-        FILE_HANDLE.write("%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t" % (contigName,GFF_source, GFF_type,GFF_start,GFF_end,GFF_score,GFF_strand,GFF_phase))
-
-        # Write identifier to column 9
-        FILE_HANDLE.write("%s%s" % (GFF_identifier, ';'))
+        # Write 1st 8 columns of data to file, and identifier to column 9
+        FILE_HANDLE.write("%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s;" % (contigName,GFF_source,GFF_type,GFF_start,GFF_end,GFF_score,GFF_strand,GFF_phase,GFF_identifier))
 
         # Column 9 has many sub-fields, continuing with the annotation homologies
+        annotFields = []
         count = 1
-        if len(self.annotationList) > 0:
-            for annotation in self.annotationList:
-                annotNo = "annot" + str(count) + '='
-                if fIRST:
-                    FILE_HANDLE.write("%s" % (annotNo))
-                    annotation.returnGFFannotationRecord(FILE_HANDLE)
-                    FIRST = False
-                else:
-                    FILE_HANDLE.write("%s%s" % ('; ',annotNo))
-                    annotation.returnGFFannotationRecord(FILE_HANDLE)
-                count += 1
-        FILE_HANDLE.write("\n" % ())
+        for annot in self.annotationList:
+            annotFields.append("annot" + str(count) + '=' + annot.getGFFannotationRecord())
+            count += 1
+        FILE_HANDLE.write('; '.join(annotFields) + "\n")
 
     #*** Fill out this method as printAll() above
     def printAll2file(self,FILE_HANDLE):  # Dump everything: useful for testing  
         count = 0 
-        FILE_HANDLE.write("%s%s%s" % ("Header:",self.header,"\n"))
-        FILE_HANDLE.write("%s%s%s" % ("ShortHeader:",self.shortHeader,"\n"))
-        FILE_HANDLE.write("%s%s%s" % ("TruncHeader:",self.truncHeader,"\n"))
-        FILE_HANDLE.write("%s%s%s" % ("BlastHeader:",self.blastHeader,"\n"))
-        FILE_HANDLE.write("%s%s%s" % ("SequentialHeader:",self.sequentialHeader,"\n"))
-        FILE_HANDLE.write("%s%s%s" % ("Type:",self.sequenceType,"\n"))
-        FILE_HANDLE.write("%s%s%s" % ("Order in list:",self.order,"\n"))
-        FILE_HANDLE.write("%s%s%s" % ("Sequence length is:",self.getSequenceLength(),"\n"))
+        FILE_HANDLE.write("Header:%s\nShortHeader:%s\nTruncHeader:%s\nBlastHeader:%s\nSequentialHeader:%s\nType:%s\nOrder in list:%s\nSequence length is:%s\n" %
+            (self.header,self.shortHeader,self.truncHeader,self.blastHeader,self.sequentialHeader,self.sequenceType,self.order,self.getSequenceLength()))
         if (self.annotationList):
             count += 1
-            FILE_HANDLE.write("%s%s%s" % ("Annotation Set No.",count,":\n"))
+            FILE_HANDLE.write("Annotation Set No.%s:\n" % (count))
             self.printAnnotations2file(FILE_HANDLE)
-        FILE_HANDLE.write("%s%s%s" % ("Sequence:",self.sequence,"\n"))
+        FILE_HANDLE.write("Sequence:%s\n" % (self.sequence))
 
     def splitToList(self,lineLength):  # Returns a list of sequence lines
-        nextLine = ""
-        sequenceList = []
-        numberList = list(range(0,len(self.sequence),lineLength))
-        for number in numberList:
-            nextSegment = self.sequence[int(number):int(number+lineLength)]
-            sequenceList.append(nextSegment)
-        return(sequenceList)
+        seq = self.sequence
+        return [seq[i:i+lineLength] for i in range(0,len(seq),lineLength)]
+
+    def iterLines(self,lineLength):  # Yields sequence lines one at a time, rather than building a list
+        seq = self.sequence
+        for i in range(0,len(seq),lineLength):
+            yield seq[i:i+lineLength]
  
     def getAnnotationList(self):
         return self.annotationList
@@ -623,21 +631,15 @@ class fasta(object):
             annot.printAnnotationRecord()
 
     def printAnnotations_tab(self): # Streamlined output
-        if self.annotationList != []:
-            FIRST = True
+        if self.annotationList:
+            self.annotationList[0].printAnnotationRecord_tabHeader()
             for annot in self.annotationList:
-                if FIRST:
-                    annot.printAnnotationRecord_tabHeader()
-                    FIRST = False
                 annot.printAnnotationRecord_tab()
 
     def printAnnotations2file_tab(self,FILE_HANDLE): # Streamlined output
-        if self.annotationList != []:
-            FIRST = True
+        if self.annotationList:
+            self.annotationList[0].printAnnotationRecord2file_tabHeader(FILE_HANDLE)
             for annot in self.annotationList:
-                if FIRST:
-                    annot.printAnnotationRecord2file_tabHeader(FILE_HANDLE)
-                    FIRST = False
                 annot.printAnnotationRecord2file_tab(FILE_HANDLE)
 
     def printAnnotations2file(self,FILE_HANDLE):
@@ -657,20 +659,31 @@ class multiFasta(object):
     # The order is needed so that it can be re-ordered based on, for example,
     # ...shifting the start position on the genome.
 
+    # As for class fasta, attributes are declared in __slots__ (no per-object __dict__)
+    __slots__ = ('fastaList','annotationList','filename','moleculeType','sequenceType','contig','parentName','headerIndex','headerIndexStale','lastOrder')
+
     def __init__(self):
         self.fastaList      = []  # list of fasta objects
         self.annotationList = []
         self.filename       = 'unknown'
         self.moleculeType   = 'unknown'
+        self.sequenceType   = 'unknown'  # 'nt' or 'aa'; set by genomeSequence
         self.contig         = 'unknown'  # redundant (use parentName)
         self.parentName     = ''         # contig name for gene or protein set; genome name for contig set
+        self.headerIndex    = {}         # header => (1st) fasta object having that header; see matchHeader
+        self.headerIndexStale = False    # set when headers in the list are re-derived (eg, removeEMBOSSpostfix)
+        self.lastOrder      = 0          # order assigned to the most recently added fasta; see addFasta, renumber
 
     def findStringInHeader(self,searchString):
-        found = False
-        for fasta in self.fastaList:
-            match_string2header = re.search(searchString,fasta.header)
-            if match_string2header:
-                return(fasta)
+        if REGEX_METACHARS.isdisjoint(searchString):  # plain text: substring test, no regex engine
+            for fa in self.fastaList:
+                if searchString in fa.header:
+                    return(fa)
+        else:
+            search = re.compile(searchString).search  # compile (or fetch from re's cache) once, not once per header
+            for fa in self.fastaList:
+                if search(fa.header):
+                    return(fa)
         if PHATE_WARNINGS == 'True':
             print("cgp_fastaSequence says, WARNING: Fasta not found for", searchString)
         return(0)
@@ -690,113 +703,167 @@ class multiFasta(object):
         return stats
 
     def countParalogs(self):  # count no. of fastas that have paralogs (not total paralog hits)
-        count = 0
-        for fasta in self.fastaList:
-           if fasta.paralogList:
-               count += 1 
-        return count
+        return sum(1 for fa in self.fastaList if fa.paralogList)
 
     def assignContig(self,contigName):
         self.contig = contigName
 
+    # The assign*2all-style methods below set the attribute directly, rather than through a per-fasta method call
+
     def assignContig2all(self,contigName):
         for fa in self.fastaList:
-            fa.assignContig(contigName)
+            fa.contig = contigName
 
     def assignParent(self,parentName):
         self.parentName = parentName
 
-    def assignCompoundHeaders(self,prependString):
+    def assignCompoundHeaders(self,prependString):  # As fasta.assignCompoundHeader, with cleanHeader as hdr
         for fa in self.fastaList:
-            fa.assignCompoundHeader(prependString)
+            fa.compoundHeader = prependString + '_' + fa.cleanHeader
 
     def assignMoleculeType(self,molType):
-        for fasta in self.fastaList:
-            fasta.moleculeType = molType
+        for fa in self.fastaList:
+            fa.moleculeType = molType
 
     def addFasta(self,newFa):
-        newFa.order = len(self.fastaList) + 1
+        # Order is taken from a running count, so a fasta added after a deletion does not reuse an existing order
+        self.lastOrder += 1
+        newFa.order = self.lastOrder
         newFa.moleculeType = self.moleculeType
         self.fastaList.append(newFa)
+        self.headerIndex.setdefault(newFa.header,newFa)
 
     def addFastaWithMetadata(self,newFa,metaData):
         if isinstance(metaData,dict):
-            if "annotationList" in list(metaData.keys()):
+            if "annotationList" in metaData:
                 newFa.annotationList = metaData["annotationList"]
-            if "contig" in list(metaData.keys()):
+            if "contig" in metaData:
                 newFa.contig = metaData["contig"]
-        newFa.order = len(self.fastaList) + 1
-        newFa.moleculeType = self.moleculeType
-        self.fastaList.append(newFa)
+        self.addFasta(newFa)
         return
 
     def addFastas(self,lines,mtype): # Given multi-fasta file read into line set, create multi-fasta object
-        sequence = ""
-        numberAdded = 0
         if lines:
-            header = lines[0] # capture 1st header (should be first line in lineSet!)
-            lines.pop(0)
-            for line in lines:
-                match = re.search(p_header, line) # detect start of a new fasta
-                if match:
-                    newFasta = fasta()            # create new object
-                    newFasta.moleculeType = self.moleculeType
-                    numberAdded += 1              # no. of fasta objects added so far from lines
-                    newFasta.order = numberAdded
-                    newFasta.assignHeader(header) # 
-                    newFasta.assignSequence(sequence)
-                    newFasta.assignType(mtype)
-                    self.addFasta(newFasta)
-                    sequence = ""                 # reset
-                    header = line                 # capture next header
-                    continue
-                sequence += line
-            newFasta = fasta()
-            newFasta.moleculeType = self.moleculeType
-            numberAdded += 1              # no. of fasta objects added so far from lines
-            newFasta.order = numberAdded
-            newFasta.assignHeader(header)
-            newFasta.assignSequence(sequence)
-            newFasta.assignType(mtype)
-            self.addFasta(newFasta)
-            numberAdded += 1
+            return self.addFastasFromBytes('\n'.join(lines).encode(),mtype)
+        return 0
+
+    def addFastaRecord(self,header,sequence,mtype): # Create a fasta object from header and sequence text, and add it
+        newFasta = fasta()
+        newFasta.moleculeType = self.moleculeType
+        newFasta.assignHeader(header)
+        newFasta.assignSequence(sequence)
+        newFasta.assignType(mtype)
+        self.addFasta(newFasta)
+
+    def addFastasFromBytes(self,data,mtype): # Given multi-fasta data (bytes or mmap), create fasta objects in a single pass
+        startCount = len(self.fastaList)
+        if p_nonSpace.search(data):  # (unlike strip(), does not copy the data)
+            # Split on header boundaries, rather than examining the data line by line
+            for record in iterFastaRecords(data):
+                headerEnd = record.find(b'\n')
+                if headerEnd == -1:  # header with no sequence
+                    header = record
+                    sequence = b''
+                else:
+                    header = record[:headerEnd]
+                    sequence = record[headerEnd+1:]  # newlines are removed by assignSequence
+                self.addFastaRecord(header.decode().rstrip('\r'),sequence.decode(),mtype)
+        return len(self.fastaList) - startCount
+
+    def addFastasFromStream(self,fastaFile,mtype): # Given multi-fasta file opened in binary mode, read and parse it block by block
+        # Only complete records are parsed from each block; the trailing, partial record is carried into the next block.
+        # Peak memory is thus about one block plus the longest record, rather than the whole file.
+        numberAdded = 0
+        pieces = []     # data read, but not yet parsed (start of the current, incomplete record)
+        lastByte = b''  # last byte of previous block, in case a block boundary falls between '\n' and '>'
+        while True:
+            block = fastaFile.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            cut = block.rfind(b'\n>')  # position in block of the '\n' preceding the last header
+            if cut != -1:
+                pieces.append(block[:cut])
+                numberAdded += self.addFastasFromBytes(b''.join(pieces),mtype)
+                pieces = [block[cut+1:]]
+            elif lastByte == b'\n' and block[:1] == b'>':  # header starts this block; its '\n' ended the previous block
+                numberAdded += self.addFastasFromBytes(b''.join(pieces),mtype)
+                pieces = [block]
+            else:               # no new record starts in this block
+                pieces.append(block)
+            lastByte = block[-1:]
+        numberAdded += self.addFastasFromBytes(b''.join(pieces),mtype)
         return numberAdded
 
-    def addFastasFromFile(self,mtype):
+    def addFastaHeaders(self,fastaFile,mtype): # Given open multi-fasta file, create fasta objects with headers only (no sequence)
+        startCount = len(self.fastaList)
+        for line in fastaFile:
+            if line[:1] == '>':  # sequence lines are skipped without further examination
+                self.addFastaRecord(line.rstrip('\r\n'),'',mtype)
+        return len(self.fastaList) - startCount
+
+    def addFastasFromFile(self,mtype,headersOnly=False): # headersOnly: when only headers are needed (eg, matchHeader)
         if self.filename == "unknown" or self.filename == '':
             if PHATE_WARNINGS == 'True':
                 print("cgp_fastaSequence says, ERROR: First you must set the filename in addFastasFromFile()")
-        else:
+        elif self.filename.endswith('.gz'):  # Compressed: parse the decompressed data as a stream
+            fastaFile = openGzipFile(self.filename)
+            if headersOnly:
+                self.addFastaHeaders(io.TextIOWrapper(fastaFile),mtype)
+            else:
+                self.addFastasFromStream(fastaFile,mtype)
+            fastaFile.close()
+        elif headersOnly:
             fastaFile = open(self.filename,"r")
-            fLines = fastaFile.read().splitlines()
-            self.addFastas(fLines,mtype)
+            self.addFastaHeaders(fastaFile,mtype)
+            fastaFile.close()
+        else:
+            # A regular file is memory-mapped and parsed in place: only the records themselves are copied out.
+            # Otherwise (eg, a pipe), or if the file cannot be mapped, it is read block by block.
+            fastaFile = open(self.filename,"rb")
+            try:
+                fastaMap = mmap.mmap(fastaFile.fileno(),0,access=mmap.ACCESS_READ)
+            except (ValueError,OSError):  # eg, empty file, or not mappable
+                fastaMap = None
+            if fastaMap is None:
+                self.addFastasFromStream(fastaFile,mtype)
+            else:
+                with fastaMap:
+                    self.addFastasFromBytes(fastaMap,mtype)
+            fastaFile.close()
 
     def addAnnotation(self,newAnnot):
         self.annotationList.append(newAnnot)
 
     def deleteFasta(self,oldFasta):
-        for fa in self.fastaList:
-            if fa == oldFasta:
-                self.fastaList.remove(fa)
-                return True
-        return False
+        try:
+            self.fastaList.remove(oldFasta)  # fasta objects compare by identity; list search and removal run in C
+        except ValueError:
+            return False
+        if self.headerIndex.get(oldFasta.header) is oldFasta:
+            del self.headerIndex[oldFasta.header]  # a later fasta with the same header is found by matchHeader's scan
+        return True
 
     def printMultiFasta(self):
         for fa in self.fastaList:
             fa.printFasta()
 
-    def printMultiFasta2file(self,FILE_HANDLE):
-        for fa in self.fastaList:
-            fa.printFasta2file(FILE_HANDLE)
+    # The header type is resolved once for the whole list, rather than once per fasta by printFasta2file*,
+    # and records are passed to the file handle with a single writelines() call
 
-    def printMultiFasta2file_case(self,FILE_HANDLE,case):
-        for fa in self.fastaList:
-            fa.printFasta2file_case(FILE_HANDLE,case)
+    def printMultiFasta2file(self,FILE_HANDLE,headerType="short"):
+        headerAttr = fasta.HEADER_ATTR.get(headerType.lower(),'shortHeader')
+        FILE_HANDLE.writelines(">%s\n%s\n" % (getattr(fa,headerAttr),fa.sequence) for fa in self.fastaList)
+
+    def printMultiFasta2file_case(self,FILE_HANDLE,case,headerType="short"):
+        headerAttr = fasta.HEADER_ATTR.get(headerType.lower(),'shortHeader')
+        if case.lower() == "upper":
+            FILE_HANDLE.writelines(">%s\n%s\n" % (getattr(fa,headerAttr),fa.sequence.upper()) for fa in self.fastaList)
+        else:
+            FILE_HANDLE.writelines(">%s\n%s\n" % (getattr(fa,headerAttr),fa.sequence) for fa in self.fastaList)
 
     def printMultiFasta2file_custom(self,FILE_HANDLE):
-        for fa in self.fastaList:
-            if fa.customHeader:  # If the custom header is not empty string, then ok to print
-                fa.printFasta2file(FILE_HANDLE,"custom")
+        # If the custom header is not empty string, then ok to print
+        FILE_HANDLE.writelines(">%s\n%s\n" % (fa.customHeader,fa.sequence) for fa in self.fastaList if fa.customHeader)
 
     def printAll(self):
         count = 0
@@ -817,21 +884,63 @@ class multiFasta(object):
             FILE_HANDLE.write("%s" % ("\n"))
 
     def renumber(self):  # If any fasta object was deleted, then renumber to close gaps in ordering
-        newOrder = 0     # Caution:  this will re-order fasta objects in sequence!
-        for fa in self.fastaList:
-            newOrder += 1
+        # Caution:  this will re-order fasta objects in sequence!
+        for newOrder, fa in enumerate(self.fastaList,1):
             fa.order = newOrder 
+        self.lastOrder = len(self.fastaList)
+
+    def indexHeaders(self):  # (Re)build the header index from scratch
+        self.headerIndex = {}
+        for fa in self.fastaList:
+            self.headerIndex.setdefault(fa.header,fa)
+        self.headerIndexStale = False
 
     def matchHeader(self,hdr):
+        fa = self.headerIndex.get(hdr)
+        if fa is not None and fa.header == hdr:
+            return fa
+        if self.headerIndexStale:  # all headers were re-derived since indexing: re-index the list once
+            self.indexHeaders()
+            fa = self.headerIndex.get(hdr)
+            if fa is not None and fa.header == hdr:
+                return fa
+        # Not indexed, eg, header changed after the fasta was added, or fasta appended to fastaList directly:
+        # scan the list (as for any miss), and index a hit for next time
         for fa in self.fastaList:
             if fa.header == hdr:
+                self.headerIndex[hdr] = fa
                 return fa
         return False
 
+    # As the fasta methods of the same name, but applied in a single pass over the list
+
     def removeEMBOSSpostfix(self):  # remove pesky '_1' that EMBOSS adds to translated sequence
         for prot in self.fastaList:
-            prot.removeEMBOSSpostfix()
+            prot.assignHeader(prot.header.rstrip("_1 "))  # re-derive the other header types as well
+        self.headerIndexStale = True
 
     def removeTerminalAsterisk(self):  # remove '*' that EMBOSS adds to end of protein translation 
         for prot in self.fastaList:
-            prot.removeTerminalAsterisk()
+            prot.sequence = prot.sequence.rstrip("* ")
+
+#####################################################################################
+
+# Reading many fasta files: each file is parsed into its own multiFasta object, in parallel if threads > 1
+
+def readMultiFastaFile(fileInfo):  # Worker: fileInfo is (filename, mtype, moleculeType); returns multiFasta object
+    (filename,mtype,moleculeType) = fileInfo
+    newMultiFasta = multiFasta()
+    newMultiFasta.filename = filename
+    newMultiFasta.moleculeType = moleculeType
+    newMultiFasta.addFastasFromFile(mtype)
+    return newMultiFasta
+
+def readMultiFastaFiles(filenames,mtype,moleculeType='unknown',threads=1):  # Returns list of multiFasta objects, in order of filenames
+    fileInfoList = [(filename,mtype,moleculeType) for filename in filenames]
+    threads = int(threads)
+    if threads <= 1 or len(fileInfoList) <= 1:
+        return [readMultiFastaFile(fileInfo) for fileInfo in fileInfoList]
+    chunksize = max(1, len(fileInfoList) // (threads * 4))
+    with Pool(threads) as readPool:  # workers are shut down on exit, even if a worker raised
+        multiFastaList = readPool.map(readMultiFastaFile,fileInfoList,chunksize)
+    return multiFastaList